@@ -24,7 +24,9 @@
     ],
     'assets': {
         'web.assets_backend': [
-            ('include', 'https://unpkg.com/livekit-client@latest/dist/livekit-client.umd.js'),
+            # Version-pinned so browsers can cache the bundle long-term
+            # (@latest changes under us and defeats HTTP caching)
+            ('include', 'https://unpkg.com/livekit-client@2.13.3/dist/livekit-client.umd.js'),
             # Load XML templates first so they're available when JS components load
             'voice_agent/static/src/xml/voice_page.xml',
             'voice_agent/static/src/xml/chat_widget.xml',
@@ -4,112 +4,307 @@ Only provides /voice/token endpoint for LiveKit access
 """
 from odoo import http
 from odoo.http import request
+import importlib
 import logging
 import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from types import MappingProxyType
 
 _logger = logging.getLogger(__name__)
 
+# orjson encodes small dicts several times faster than stdlib json;
+# optional dependency, stdlib is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_response(payload):
+    """Build a JSON response, using orjson for encoding when available."""
+    if orjson is not None:
+        return request.make_response(
+            orjson.dumps(payload),
+            headers=[('Content-Type', 'application/json; charset=utf-8')],
+        )
+    return request.make_json_response(payload)
+
+
+# Process-local cache of signed JWTs keyed by (db, user id, identity, room).
+# LiveKit tokens are valid for hours but clients request a fresh one on every
+# page load / reconnect, so re-signing each time is wasted DB and crypto work.
+# All module-level caches below are keyed by database name: one worker can
+# serve several databases, each with its own users and LiveKit deployment.
+_TOKEN_TTL = 6 * 3600  # seconds; mirrored in the AccessToken's own TTL
+_TOKEN_CACHE_MAX = 1024
+# Clients may reuse a token response until this long before the JWT's real
+# expiry; the advertised lifetime must track the token actually served, which
+# can come from the server cache with far less than _TOKEN_TTL left
+_TOKEN_REUSE_MARGIN = 3600  # seconds
+_TOKEN_CACHE = {}  # (dbname, user_id, identity, room_name) -> (jwt, expiry_timestamp)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+
+def _token_response(room_name, token, url, agent_id, expires_at):
+    """Build a token response whose reuse lifetime tracks the JWT's expiry."""
+    response = _json_response({
+        'room': room_name,
+        'token': token,
+        'url': url,
+        'agent_id': agent_id,
+        'expires_at': int(expires_at),
+    })
+    max_age = int(expires_at - time.time()) - _TOKEN_REUSE_MARGIN
+    if max_age > 0:
+        response.headers['Cache-Control'] = 'private, max-age=%d' % max_age
+    return response
+
+# LiveKit credentials are static per deployment; resolve them once per worker
+# and refresh every few minutes instead of hitting the DB on every request.
+_LK_CONFIG_TTL = 300  # seconds
+_LK_CONFIG = {}  # dbname -> {'url': ..., 'key': ..., 'secret': ..., 'ts': ...}
+_LK_CONFIG_LOCK = threading.Lock()
+
+
+def _load_livekit_config(env):
+    """Return (url, api_key, api_secret), cached per db for a few minutes."""
+    now = time.time()
+    cfg = _LK_CONFIG.get(env.cr.dbname)
+    if cfg and now - cfg['ts'] < _LK_CONFIG_TTL:
+        return cfg['url'], cfg['key'], cfg['secret']
+    url = os.getenv('LIVEKIT_URL')
+    key = os.getenv('LIVEKIT_API_KEY')
+    secret = os.getenv('LIVEKIT_API_SECRET')
+    if not (url and key and secret):
+        # Fetch all three parameters in a single query instead of one
+        # get_param round-trip each
+        rows = env['ir.config_parameter'].sudo().search_read(
+            [('key', 'in', ['livekit.url', 'livekit.api_key', 'livekit.api_secret'])],
+            ['key', 'value'],
+        )
+        params = {row['key']: row['value'] for row in rows}
+        url = url or params.get('livekit.url', '')
+        key = key or params.get('livekit.api_key', '')
+        secret = secret or params.get('livekit.api_secret', '')
+    # Normalize once here so responses don't re-strip the URL per request
+    url = (url or '').rstrip('/')
+    with _LK_CONFIG_LOCK:
+        _LK_CONFIG[env.cr.dbname] = {'url': url, 'key': key, 'secret': secret, 'ts': now}
+    return url, key, secret
+
+
+# Agent prompts, built once at import time (read-only so handlers can't
+# accidentally mutate shared state)
+_AGENT_PROMPTS = MappingProxyType({
+    'customer_support': 'You are a helpful customer support agent. Assist users with their questions and issues in a friendly and professional manner.',
+    'accounting': 'You are an accounting assistant. Help users with financial questions, accounting principles, and bookkeeping tasks.',
+    'general': 'You are a helpful AI assistant. Answer questions and provide assistance on various topics.',
+})
+
+# LiveKit requires identity to be alphanumeric with underscores/hyphens;
+# precompiled once so the hot path doesn't recompile the pattern per request
+_IDENTITY_RE = re.compile(r'[^a-zA-Z0-9_.\-]')
+
+# Sanitized identities are deterministic per (user, login); memoize them so
+# repeat requests from the same user skip the string work entirely
+_IDENTITY_CACHE_MAX = 10000
+_IDENTITY_CACHE = OrderedDict()  # (dbname, user_id) -> (login, identity)
+_IDENTITY_CACHE_LOCK = threading.Lock()
+
+
+def _sanitize_identity(identity):
+    """Clean a login/name into a LiveKit-safe participant identity."""
+    identity = identity.strip().replace('@', '_at_').replace(' ', '_')
+    return _IDENTITY_RE.sub('', identity)
+
+
+def _reset_livekit_config(dbname):
+    """Drop a db's cached credentials (and dependent tokens) after a key change."""
+    with _LK_CONFIG_LOCK:
+        _LK_CONFIG.pop(dbname, None)
+    with _TOKEN_CACHE_LOCK:
+        for key in [k for k in _TOKEN_CACHE if k[0] == dbname]:
+            del _TOKEN_CACHE[key]
+
 # Import LiveKit SDK
 try:
     from livekit import api
     HAS_LIVEKIT_SDK = True
 except ImportError as e:
+    api = None
     HAS_LIVEKIT_SDK = False
-    import logging
-    _import_logger = logging.getLogger(__name__)
-    _import_logger.warning(f"LiveKit SDK import failed: {str(e)}. Please ensure livekit is installed in the Odoo Python environment.")
+    _logger.warning("LiveKit SDK import failed: %s. Please ensure livekit is installed in the Odoo Python environment.", e)
+
+
+# Grants only depend on the room name (one room per agent), so the objects
+# can be built once per worker and reused across token requests
+_GRANTS_CACHE = {}  # room_name -> api.VideoGrants
+
+
+def _video_grants(room_name):
+    """Return the (shared, reusable) VideoGrants for a room."""
+    grants = _GRANTS_CACHE.get(room_name)
+    if grants is None:
+        grants = _GRANTS_CACHE[room_name] = api.VideoGrants(
+            room_join=True,
+            can_publish=True,
+            can_subscribe=True,
+            room=room_name
+        )
+    return grants
 
 
 class VoiceController(http.Controller):
     """Minimal voice controller - only token generation"""
     
-    @http.route('/voice/token', type='json', auth='user', methods=['POST'])
-    def get_token(self, agent_id=None):
+    @http.route('/voice/token', type='http', auth='user', methods=['POST'], csrf=False)
+    def get_token(self, force=None):
         """
         Generate LiveKit access token for user
-        Args:
-            agent_id: ID of the voice agent (e.g., 'customer_support', 'accounting')
-        Returns: {room, token, url, agent_id, prompt}
+        Body (JSON): {agent_id}: ID of the voice agent (e.g., 'customer_support', 'accounting')
+        Query args: force: skip the token cache (e.g. ?force=1 after a key rotation)
+        Returns: {room, token, url, agent_id, expires_at}
+        (prompts are served separately by /voice/agent/<agent_id>/prompt)
+
+        Served as type='http' with a plain JSON body to skip the JSON-RPC
+        envelope encode/decode on every call.
         """
+        # Any valid JSON is accepted by get_json ([], "x", 5...); only read
+        # agent_id when the body is actually an object
+        body = request.httprequest.get_json(silent=True)
+        agent_id = body.get('agent_id') if isinstance(body, dict) else None
+        if not HAS_LIVEKIT_SDK:
+            return _json_response({
+                'error': 'LiveKit SDK not available. Please ensure livekit is installed in the Odoo Python environment: pip install livekit --break-system-packages'
+            })
         try:
             # Get LiveKit credentials from environment or system parameters
-            # For MVP, we'll use environment variables or system parameters
-            livekit_url = os.getenv('LIVEKIT_URL') or request.env['ir.config_parameter'].sudo().get_param('livekit.url', '')
-            livekit_api_key = os.getenv('LIVEKIT_API_KEY') or request.env['ir.config_parameter'].sudo().get_param('livekit.api_key', '')
-            livekit_api_secret = os.getenv('LIVEKIT_API_SECRET') or request.env['ir.config_parameter'].sudo().get_param('livekit.api_secret', '')
+            # (cached per worker, see _load_livekit_config)
+            livekit_url, livekit_api_key, livekit_api_secret = _load_livekit_config(request.env)
             
-            if not all([livekit_url, livekit_api_key, livekit_api_secret]):
-                return {
+            if not (livekit_url and livekit_api_key and livekit_api_secret):
+                return _json_response({
                     'error': 'LiveKit not configured. Please set LIVEKIT_URL, LIVEKIT_API_KEY, and LIVEKIT_API_SECRET environment variables or system parameters.'
-                }
-            
-            # Define agent prompts
-            agent_prompts = {
-                'customer_support': 'You are a helpful customer support agent. Assist users with their questions and issues in a friendly and professional manner.',
-                'accounting': 'You are an accounting assistant. Help users with financial questions, accounting principles, and bookkeeping tasks.',
-                'general': 'You are a helpful AI assistant. Answer questions and provide assistance on various topics.',
-            }
+                })
             
             # Default to general if agent_id not provided or invalid
-            if not agent_id or agent_id not in agent_prompts:
+            if not agent_id or agent_id not in _AGENT_PROMPTS:
                 agent_id = 'general'
             
             # Generate room name based on agent (per-agent rooms)
             room_name = f"voice_chat_{agent_id}"
             
-            # Get user identity - ensure it's never empty
+            # Get user identity - memoized per user, invalidated on login change.
+            # Bind the record fields to locals once; every recordset attribute
+            # access goes through the ORM's dispatch and prefetch machinery.
             user = request.env.user
-            identity = user.login or user.name or f"user_{user.id}" or "anonymous"
-            
-            # Ensure identity is a non-empty string and sanitize it
-            if not identity or not identity.strip():
-                identity = f"user_{user.id}" if user.id else "anonymous"
-            
-            # Sanitize identity: remove spaces and special characters that might cause issues
-            # LiveKit requires identity to be alphanumeric with underscores/hyphens
-            identity = identity.strip().replace(' ', '_').replace('@', '_at_')
-            # Remove any other special characters except underscore, hyphen, and dot
-            import re
-            identity = re.sub(r'[^a-zA-Z0-9_\-.]', '', identity)
-            
-            # Final validation - ensure identity is not empty after sanitization
-            if not identity or len(identity) == 0:
-                identity = f"user_{user.id}" if user.id else "anonymous"
-            
-            # Log for debugging
-            _logger.info(f"Generating LiveKit token for user: {user.id} (login: {user.login}), identity: {identity}")
+            uid = user.id
+            login = user.login
+            dbname = request.env.cr.dbname
+            identity_key = (dbname, uid)
+            with _IDENTITY_CACHE_LOCK:
+                cached_identity = _IDENTITY_CACHE.get(identity_key)
+            if cached_identity and cached_identity[0] == login:
+                identity = cached_identity[1]
+            else:
+                fallback = f"user_{uid}" if uid else "anonymous"
+
+                # Build the identity - ensure it's never empty
+                identity = login or user.name or fallback
+
+                # Ensure identity is a non-empty string and sanitize it
+                if not identity.strip():
+                    identity = fallback
+
+                # Sanitize identity: remove spaces and special characters that might cause issues
+                identity = _sanitize_identity(identity)
+
+                # Final validation - ensure identity is not empty after sanitization
+                if not identity:
+                    identity = fallback
+
+                with _IDENTITY_CACHE_LOCK:
+                    if len(_IDENTITY_CACHE) >= _IDENTITY_CACHE_MAX:
+                        _IDENTITY_CACHE.popitem(last=False)
+                    _IDENTITY_CACHE[identity_key] = (login, identity)
             
+            # Serve a cached token if we still have a valid one for this
+            # user/room pair (pass ?force=1 to bypass, e.g. after a key
+            # rotation). The identity is part of the key because it is baked
+            # into the JWT: a login change must not resurrect the old identity.
+            cache_key = (dbname, uid, identity, room_name)
+            if not force:
+                with _TOKEN_CACHE_LOCK:
+                    cached = _TOKEN_CACHE.get(cache_key)
+                if cached and cached[1] - time.time() > 60:
+                    return _token_response(room_name, cached[0], livekit_url,
+                                           agent_id, cached[1])
+
+            # Log for debugging (lazy %-formatting so the strings are only
+            # built when INFO is actually enabled)
+            if _logger.isEnabledFor(logging.INFO):
+                _logger.info("Generating LiveKit token for user: %s (login: %s), identity: %s",
+                             uid, login, identity)
+
             # Generate LiveKit access token using the SDK (following generate_room_token.py pattern)
-            # Try to import livekit at runtime (in case it was installed after module load)
-            try:
-                from livekit import api
-            except ImportError as import_error:
-                error_msg = f'LiveKit SDK not available. Import error: {str(import_error)}. Please ensure livekit is installed in the Odoo Python environment: pip install livekit --break-system-packages'
-                _logger.error(error_msg)
-                return {'error': error_msg}
-            
             # Generate token using method chaining (same pattern as sample)
             # Added can_publish and can_subscribe for voice chat functionality
             token = api.AccessToken(livekit_api_key, livekit_api_secret) \
                 .with_identity(identity) \
-                .with_grants(api.VideoGrants(
-                    room_join=True,
-                    can_publish=True,
-                    can_subscribe=True,
-                    room=room_name
-                )) \
+                .with_ttl(timedelta(seconds=_TOKEN_TTL)) \
+                .with_grants(_video_grants(room_name)) \
                 .to_jwt()
-            
-            _logger.info(f"Token generated successfully using LiveKit SDK for identity: {identity}, agent: {agent_id}")
-            
-            return {
-                'room': room_name,
-                'token': token,
-                'url': livekit_url.rstrip('/'),
-                'agent_id': agent_id,
-                'prompt': agent_prompts[agent_id]
-            }
-            
-        except Exception as e:
-            _logger.error(f"Error generating LiveKit token: {str(e)}", exc_info=True)
-            return {'error': str(e)}
+
+            # Memoize the signed JWT; FIFO-evict the oldest entry once full
+            expires_at = time.time() + _TOKEN_TTL
+            with _TOKEN_CACHE_LOCK:
+                if len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAX:
+                    _TOKEN_CACHE.pop(next(iter(_TOKEN_CACHE)))
+                _TOKEN_CACHE[cache_key] = (token, expires_at)
+
+            _logger.info("Token generated successfully using LiveKit SDK for identity: %s, agent: %s",
+                         identity, agent_id)
+
+            return _token_response(room_name, token, livekit_url, agent_id, expires_at)
+
+        except Exception:
+            # Keep the details in the log only; clients get a stable error
+            # code plus an id to correlate with the traceback
+            err_id = uuid.uuid4().hex
+            _logger.error("Error generating LiveKit token (error id %s)", err_id, exc_info=True)
+            return _json_response({'error': 'internal_error', 'id': err_id})
+
+    @http.route('/voice/agent/<string:agent_id>/prompt', type='http', auth='user', methods=['GET'])
+    def get_agent_prompt(self, agent_id):
+        """
+        Return the (static) prompt for an agent
+        Split out of the token response so the multi-hundred-character prompt
+        is fetched once and browser-cached instead of shipped on every token call
+        """
+        if agent_id not in _AGENT_PROMPTS:
+            agent_id = 'general'
+        response = _json_response({'agent_id': agent_id, 'prompt': _AGENT_PROMPTS[agent_id]})
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
+
+    @http.route('/voice/reload_sdk', type='json', auth='user', methods=['POST'])
+    def reload_sdk(self):
+        """
+        Re-import the LiveKit SDK after it was installed at runtime,
+        so workers don't need a restart (admin only)
+        """
+        global api, HAS_LIVEKIT_SDK
+        if not request.env.user._is_admin():
+            return {'error': 'Only administrators can reload the SDK'}
+        if not HAS_LIVEKIT_SDK:
+            try:
+                api = importlib.import_module('livekit.api')
+                HAS_LIVEKIT_SDK = True
+            except ImportError as e:
+                return {'error': str(e)}
+        return {'loaded': True}
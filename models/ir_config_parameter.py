@@ -0,0 +1,35 @@
+"""
+Invalidate the voice controller's cached LiveKit credentials when an admin
+changes them through system parameters.
+"""
+from odoo import api, models
+
+from ..controllers import voice_api
+
+_LIVEKIT_KEYS = ('livekit.url', 'livekit.api_key', 'livekit.api_secret')
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # set_param creates the row when the key doesn't exist yet (the
+        # first-time-setup flow), so creation must invalidate too
+        records = super().create(vals_list)
+        if any(rec.key in _LIVEKIT_KEYS for rec in records):
+            voice_api._reset_livekit_config(self.env.cr.dbname)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('key') in _LIVEKIT_KEYS or any(rec.key in _LIVEKIT_KEYS for rec in self):
+            voice_api._reset_livekit_config(self.env.cr.dbname)
+        return res
+
+    def unlink(self):
+        reset = any(rec.key in _LIVEKIT_KEYS for rec in self)
+        res = super().unlink()
+        if reset:
+            voice_api._reset_livekit_config(self.env.cr.dbname)
+        return res
@@ -1,7 +1,6 @@
 /** @odoo-module **/
 
 import { Component, useState, onWillUnmount } from "@odoo/owl";
-import { rpc } from "@web/core/network/rpc";
 import { registry } from "@web/core/registry";
 
 // LiveKit client will be loaded from CDN (via manifest assets)
@@ -50,7 +49,8 @@ function loadLiveKitScript() {
         }
         
         const script = document.createElement('script');
-        script.src = 'https://unpkg.com/livekit-client@latest/dist/livekit-client.umd.js';
+        // Keep in sync with the pinned version in __manifest__.py
+        script.src = 'https://unpkg.com/livekit-client@2.13.3/dist/livekit-client.umd.js';
         script.async = true;
         script.onload = () => {
             setTimeout(() => {
@@ -170,6 +170,58 @@ export class ChatWidget extends Component {
         }
     }
     
+    async fetchToken(force = false) {
+        // Reuse a previously issued token while it still has time left -
+        // LiveKit tokens are valid for hours, and browsers don't cache POST
+        // responses, so persist it in sessionStorage ourselves. The reuse
+        // window comes from the server's expires_at (minus a minute), never
+        // from a fixed client-side lifetime.
+        const cacheKey = `voice_token_${this.agentId}`;
+        if (!force) {
+            try {
+                const cached = JSON.parse(sessionStorage.getItem(cacheKey));
+                if (cached && cached.expiry - Date.now() > 60000) {
+                    return cached.data;
+                }
+            } catch (e) {
+                // Ignore corrupt cache entries
+            }
+        }
+
+        // Get LiveKit token from Odoo with agent ID
+        // Plain POST (no JSON-RPC envelope) - the endpoint is type='http';
+        // force=1 also bypasses the server-side token cache
+        const response = await fetch(force ? "/voice/token?force=1" : "/voice/token", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ agent_id: this.agentId }),
+        });
+
+        // An expired session (HTML login redirect) or a proxy error page is
+        // not JSON; surface a readable error instead of a SyntaxError
+        if (!response.ok) {
+            return { error: `Token request failed (HTTP ${response.status})` };
+        }
+        let data;
+        try {
+            data = await response.json();
+        } catch (e) {
+            return { error: 'Token request returned an unexpected response - your session may have expired, try reloading the page' };
+        }
+
+        if (!data.error && data.expires_at) {
+            try {
+                sessionStorage.setItem(cacheKey, JSON.stringify({
+                    data: data,
+                    expiry: data.expires_at * 1000,
+                }));
+            } catch (e) {
+                // Storage full or disabled - just skip caching
+            }
+        }
+        return data;
+    }
+
     async connectToVoice() {
         if (!this.state.livekitLoaded) {
             this.state.error = 'LiveKit client not loaded yet. Please wait...';
@@ -185,11 +237,8 @@ export class ChatWidget extends Component {
         this.state.error = null;
 
         try {
-            // Get LiveKit token from Odoo with agent ID
-            const data = await rpc("/voice/token", {
-                agent_id: this.agentId,
-            });
-            
+            let data = await this.fetchToken();
+
             if (data.error) {
                 throw new Error(data.error);
             }
@@ -202,9 +251,20 @@ export class ChatWidget extends Component {
                 disconnectOnPageLeave: false,
             });
             
-            // Connect to room
-            await room.connect(data.url, data.token);
-            
+            // Connect to room; a cached token may have gone stale (e.g. key
+            // rotation), so evict it and retry once with a fresh one
+            try {
+                await room.connect(data.url, data.token);
+            } catch (connectError) {
+                console.warn('Connect failed, retrying with a fresh token:', connectError);
+                sessionStorage.removeItem(`voice_token_${this.agentId}`);
+                data = await this.fetchToken(true);
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                await room.connect(data.url, data.token);
+            }
+
             // Log connection success
             console.log('Connected to LiveKit room:', data.room);
             